@@ -2,13 +2,21 @@
 
 import argparse
 import ast
+import codecs
+import io
+import os
+import re
+import stat
 import sys
-import subprocess
-import fnmatch
+import functools
 import time
+import tokenize
 from pathlib import Path
-from typing import Set, List, Optional, Dict, Generator
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Set, FrozenSet, List, Optional, Dict, TextIO
+
+
+# Claude: statement fields that can hold nested statements, imports never appear inside expressions
+STATEMENT_BLOCK_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
 
 
 # Claude: this class extracts imports from Python AST
@@ -16,178 +24,446 @@ class ImportVisitor(ast.NodeVisitor):
     def __init__(self, file_path: Path):
         self.imports = set()
         self.local_imports = set()
+        self.statements: List[ast.stmt] = []
         self.file_path = file_path
+        # Claude: resolve the containing directory once rather than for every import
+        self.directory = resolve_directory(file_path.parent)
+
+    def generic_visit(self, node):
+        # Claude: only descend into statement blocks, skipping every expression subtree
+        # Claude: function and class bodies are still walked since scripts often import lazily there
+        # Claude: an explicit stack with isinstance checks avoids NodeVisitor's per-node method lookup
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, ast.Import):
+                self.visit_Import(current)
+            elif isinstance(current, ast.ImportFrom):
+                self.visit_ImportFrom(current)
+            else:
+                for field in STATEMENT_BLOCK_FIELDS:
+                    children = getattr(current, field, None)
+                    if children:
+                        # Claude: push in reverse so statements are visited in source order
+                        stack.extend(reversed(children))
 
     def visit_Import(self, node):
+        self.statements.append(node)
         for alias in node.names:
             # Claude: extract base package name from dotted imports
             package_name = alias.name.split(".")[0]
             # Claude: check if this is a local import
-            if detect_local_import(package_name, self.file_path):
+            if detect_local_import_in_directory(package_name, self.directory):
                 self.local_imports.add(package_name)
-            else:
+            elif package_name not in _STDLIB_MODULES:
                 self.imports.add(package_name)
 
     def visit_ImportFrom(self, node):
+        self.statements.append(node)
+        # Claude: relative imports always refer to the local package, never a third-party one
+        if node.level > 0:
+            prefix = "." * node.level
+            if node.module:
+                self.local_imports.add(prefix + node.module)
+            else:
+                for alias in node.names:
+                    self.local_imports.add(prefix + alias.name)
+            return
+        
         if node.module:
             # Claude: extract base package name from 'from package import' statements
             package_name = node.module.split(".")[0]
             # Claude: check if this is a local import
-            if detect_local_import(node.module, self.file_path):
+            if detect_local_import_in_directory(node.module, self.directory):
                 self.local_imports.add(node.module)
-            else:
+            elif package_name not in _STDLIB_MODULES:
                 self.imports.add(package_name)
 
 
+# Claude: matches the import keyword, used to check whether a full parse is still needed
+IMPORT_KEYWORD = re.compile(rb"\bimport\b")
+
+
+# Claude: this function scans the leading import block with tokenize instead of building a full AST
+# Claude: returns None when the rest of the file may hold more imports and needs a full parse
+def scan_header_imports(content: bytes) -> Optional[ast.Module]:
+    stream = io.BytesIO(content)
+    line_offsets = [0]
+
+    def readline() -> bytes:
+        line = stream.readline()
+        line_offsets.append(stream.tell())
+        return line
+
+    import_statements = []
+    statement = []
+    seen_statement = False
+    header_end_line = None
+    try:
+        for token in tokenize.tokenize(readline):
+            if token.type in (tokenize.ENCODING, tokenize.COMMENT, tokenize.NL):
+                continue
+
+            if token.type == tokenize.ENDMARKER:
+                break
+
+            if token.type == tokenize.NEWLINE or (token.type == tokenize.OP and token.string == ";"):
+                if statement and statement[0].type == tokenize.NAME:
+                    import_statements.append(" ".join(tok.string for tok in statement))
+                statement = []
+                seen_statement = True
+                continue
+
+            if not statement:
+                is_import = token.type == tokenize.NAME and token.string in ("import", "from")
+                # Claude: allow a module docstring before the imports
+                is_docstring = token.type == tokenize.STRING and not seen_statement
+                if not (is_import or is_docstring):
+                    # Claude: first non-import statement, the header ends here
+                    header_end_line = token.start[0]
+                    break
+            elif statement[0].type == tokenize.STRING and token.type != tokenize.STRING:
+                # Claude: the leading string was part of a larger expression, not a docstring
+                header_end_line = statement[0].start[0]
+                break
+
+            statement.append(token)
+    except (tokenize.TokenError, SyntaxError, UnicodeDecodeError):
+        return None
+
+    # Claude: fall back to a full parse if anything after the header could still be an import
+    if header_end_line is not None:
+        if IMPORT_KEYWORD.search(content, line_offsets[header_end_line - 1]):
+            return None
+
+    try:
+        return ast.parse("\n".join(import_statements))
+    except SyntaxError:
+        return None
+
+
+# Claude: this function parses Python source bytes into an AST
+def parse_source(content: bytes, file_path: Path) -> ast.Module:
+    try:
+        return ast.parse(content, filename=str(file_path))
+    except SyntaxError:
+        # Claude: retry undeclared non-UTF-8 files as latin-1, which can decode any byte sequence
+        try:
+            content.decode("utf-8")
+        except UnicodeDecodeError:
+            # Claude: a BOM would decode to junk characters under latin-1
+            if content.startswith(codecs.BOM_UTF8):
+                content = content[len(codecs.BOM_UTF8):]
+            return ast.parse(content.decode("latin-1"), filename=str(file_path))
+        raise
+
+
+# Claude: on-disk cache of each script's import statements, keyed by resolved path
+# Claude: raw statements are cached rather than dependencies since local imports depend on sibling files
+DEPS_CACHE_VERSION = 1
+# Claude: bound the cache file, entries used by the most recent runs are kept
+DEPS_CACHE_MAX_ENTRIES = 1000
+_DEPS_CACHE: Dict[str, Dict] = {}
+_deps_cache_used: Set[str] = set()
+_deps_cache_modified = False
+
+
+# Claude: in-memory cache of import statements keyed by a digest of the file contents
+_CONTENT_IMPORTS_CACHE: Dict[bytes, ast.Module] = {}
+
+
+# Claude: this function gets the location of the on-disk dependency cache, None if there is nowhere to keep it
+def get_deps_cache_path() -> Optional[Path]:
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    # Claude: the XDG spec says relative paths are invalid and should be ignored
+    if not cache_home or not os.path.isabs(cache_home):
+        try:
+            cache_home = Path.home() / ".cache"
+        except RuntimeError:
+            # Claude: no HOME and no passwd entry, e.g. an arbitrary uid in a container
+            return None
+    return Path(cache_home) / "porter" / "deps.json"
+
+
+# Claude: this function loads the on-disk dependency cache, a missing or corrupt cache is ignored
+def load_deps_cache():
+    # Claude: imported lazily to keep CLI startup fast
+    import json
+    
+    cache_path = get_deps_cache_path()
+    if cache_path is None:
+        return
+    
+    try:
+        with open(cache_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return
+    
+    if isinstance(data, dict) and data.get("version") == DEPS_CACHE_VERSION:
+        files = data.get("files")
+        if isinstance(files, dict):
+            _DEPS_CACHE.update(files)
+
+
+# Claude: this function writes the dependency cache back to disk if anything changed
+def save_deps_cache():
+    global _deps_cache_modified
+    if not _deps_cache_modified:
+        return
+    
+    # Claude: imported lazily to keep CLI startup fast
+    import json
+    
+    cache_path = get_deps_cache_path()
+    if cache_path is None:
+        return
+    
+    # Claude: write entries used this run last so they survive the size cap, dropping the oldest
+    files = {key: entry for key, entry in _DEPS_CACHE.items() if key not in _deps_cache_used}
+    files.update((key, _DEPS_CACHE[key]) for key in _deps_cache_used if key in _DEPS_CACHE)
+    if len(files) > DEPS_CACHE_MAX_ENTRIES:
+        files = dict(list(files.items())[-DEPS_CACHE_MAX_ENTRIES:])
+    
+    temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": DEPS_CACHE_VERSION, "files": files}, file)
+        # Claude: replace atomically so a concurrent run never reads a partial file
+        os.replace(temp_path, cache_path)
+        _deps_cache_modified = False
+    except OSError:
+        pass
+
+
+# Claude: this function returns the cached import statements for a file if it is unchanged
+def get_cached_imports(cache_key: str, file_stat: os.stat_result) -> Optional[ast.Module]:
+    entry = _DEPS_CACHE.get(cache_key)
+    if not isinstance(entry, dict):
+        return None
+    if entry.get("mtime_ns") != file_stat.st_mtime_ns or entry.get("size") != file_stat.st_size:
+        return None
+    
+    # Claude: anything but a list of statement strings is a corrupt entry, a bare string would join character by character
+    statements = entry.get("imports")
+    if not isinstance(statements, list) or not all(isinstance(statement, str) for statement in statements):
+        return None
+    
+    try:
+        tree = ast.parse("\n".join(statements))
+    except (SyntaxError, ValueError):
+        return None
+    _deps_cache_used.add(cache_key)
+    return tree
+
+
+# Claude: this function records a file's import statements in the dependency cache
+def cache_imports(cache_key: str, file_stat: os.stat_result, statements: List[ast.stmt]):
+    global _deps_cache_modified
+    _DEPS_CACHE[cache_key] = {
+        "mtime_ns": file_stat.st_mtime_ns,
+        "size": file_stat.st_size,
+        "imports": [ast.unparse(statement) for statement in statements]
+    }
+    _deps_cache_used.add(cache_key)
+    _deps_cache_modified = True
+
+
+# Claude: this function updates a cached file's stat after uv add, which only rewrites the metadata comment block
+def refresh_cached_imports(cache_key: str):
+    global _deps_cache_modified
+    entry = _DEPS_CACHE.get(cache_key)
+    if not isinstance(entry, dict):
+        return
+    
+    try:
+        file_stat = os.stat(cache_key)
+    except OSError:
+        _DEPS_CACHE.pop(cache_key, None)
+    else:
+        _DEPS_CACHE[cache_key] = dict(entry, mtime_ns=file_stat.st_mtime_ns, size=file_stat.st_size)
+    _deps_cache_modified = True
+
+
+# Claude: this function parses Python source bytes into an AST containing at least all of its imports
+def parse_imports(content: bytes, file_path: Path, output: Optional[TextIO] = None) -> Optional[ast.Module]:
+    # Claude: every import statement contains the import keyword, skip parsing files without it
+    if b"import" not in content:
+        return ast.Module(body=[], type_ignores=[])
+
+    # Claude: most scripts keep every import at the top, so try the cheap header scan first
+    tree = scan_header_imports(content)
+    if tree is not None:
+        return tree
+
+    # Claude: validate that the file contains valid Python syntax
+    try:
+        return parse_source(content, file_path)
+    except SyntaxError as e:
+        print(f"Syntax error in {file_path} (line {e.lineno}): {e.msg}", file=output)
+        print(f"This may not be a valid Python file. Please check the file contents.", file=output)
+    except ValueError as e:
+        print(f"Error: Could not parse file {file_path}: {e}", file=output)
+    return None
+
+
 # Claude: this function extracts third-party dependencies from a Python file
-def extract_dependencies(file_path: Path) -> tuple[Set[str], Set[str]]:
+# Claude: file_stat may be passed along with an already resolved file_path to skip repeating that work
+def extract_dependencies(file_path: Path, file_stat: Optional[os.stat_result] = None, output: Optional[TextIO] = None) -> tuple[Set[str], Set[str]]:
     # Claude: validate file size to prevent processing extremely large files
     try:
-        file_size = file_path.stat().st_size
+        if file_stat is None:
+            file_path = file_path.resolve()
+            file_stat = file_path.stat()
+        file_size = file_stat.st_size
         if file_size > 10 * 1024 * 1024:
-            print(f"Error: File {file_path} is too large ({file_size} bytes) - skipping for safety")
+            print(f"Error: File {file_path} is too large ({file_size} bytes) - skipping for safety", file=output)
             return set(), set()
         if file_size == 0:
-            print(f"Warning: File {file_path} is empty - skipping")
+            print(f"Warning: File {file_path} is empty - skipping", file=output)
             return set(), set()
-    except (OSError, PermissionError) as e:
-        print(f"Error accessing file {file_path}: {e}")
+    except (OSError, PermissionError, RuntimeError) as e:
+        print(f"Error accessing file {file_path}: {e}", file=output)
         return set(), set()
 
-    # Claude: read file with improved encoding handling
-    try:
-        # Claude: attempt UTF-8 first, then fall back to other encodings
-        encodings_to_try = ["utf-8", "utf-8-sig", "latin-1", "cp1252"]
-        content = None
-        encoding_used = None
-        
-        for encoding in encodings_to_try:
-            try:
-                with open(file_path, "r", encoding=encoding) as file:
-                    content = file.read()
-                    encoding_used = encoding
-                    break
-            except UnicodeDecodeError:
-                continue
-        
-        if content is None:
-            print(f"Error: Could not decode file {file_path} with any supported encoding")
+    # Claude: reuse the imports found on a previous run if the file hasn't changed since
+    cache_key = str(file_path)
+    tree = get_cached_imports(cache_key, file_stat)
+    digest = None
+    if tree is None:
+        # Claude: read raw bytes, ast.parse honours a BOM or PEP 263 encoding cookie itself
+        try:
+            content = file_path.read_bytes()
+        except (OSError, PermissionError) as e:
+            print(f"Error reading file {file_path}: {e}", file=output)
             return set(), set()
-            
-    except (OSError, PermissionError) as e:
-        print(f"Error reading file {file_path}: {e}")
-        return set(), set()
 
-    # Claude: validate that the file contains valid Python syntax
-    try:
-        tree = ast.parse(content)
-    except SyntaxError as e:
-        print(f"Syntax error in {file_path} (line {e.lineno}): {e.msg}")
-        print(f"This may not be a valid Python file. Please check the file contents.")
-        return set(), set()
+        # Claude: imported lazily to keep CLI startup fast
+        import hashlib
+        
+        # Claude: identical sources, such as a script copied between directories, are only parsed once
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        tree = _CONTENT_IMPORTS_CACHE.get(digest)
+        if tree is None:
+            tree = parse_imports(content, file_path, output)
+            if tree is None:
+                return set(), set()
 
     visitor = ImportVisitor(file_path)
     visitor.visit(tree)
 
-    # Claude: filter out standard library modules
-    stdlib_modules = get_stdlib_modules()
-    third_party_deps = visitor.imports - stdlib_modules
-
-    return third_party_deps, visitor.local_imports
-
-
-# Claude: this function gets the standard library module names
-def get_stdlib_modules() -> Set[str]:
+    if digest is not None:
+        # Claude: keep only the import statements rather than the whole tree
+        _CONTENT_IMPORTS_CACHE[digest] = ast.Module(body=visitor.statements, type_ignores=[])
+        cache_imports(cache_key, file_stat, visitor.statements)
+
+    # Claude: the visitor already filters out standard library modules
+    return visitor.imports, visitor.local_imports
+
+
+# Claude: minimal fallback list of common stdlib modules for older Pythons without isort
+_FALLBACK_STDLIB: FrozenSet[str] = frozenset({
+    "os", "sys", "json", "re", "datetime", "collections", "itertools",
+    "functools", "pathlib", "urllib", "http", "email", "xml", "html",
+    "csv", "sqlite3", "logging", "argparse", "subprocess", "threading",
+    "multiprocessing", "asyncio", "typing", "dataclasses", "enum",
+    "abc", "contextlib", "weakref", "copy", "pickle", "base64", "hashlib",
+    "hmac", "secrets", "uuid", "random", "math", "statistics", "decimal",
+    "fractions", "cmath", "time", "calendar", "zoneinfo", "locale",
+    "gettext", "io", "StringIO", "BytesIO", "tempfile", "glob", "fnmatch",
+    "linecache", "shutil", "stat", "filecmp", "tarfile", "zipfile",
+    "gzip", "bz2", "lzma", "configparser", "platform", "ctypes",
+    "struct", "codecs", "unicodedata", "stringprep", "readline",
+    "rlcompleter", "cmd", "shlex", "tkinter", "turtle", "pdb", "profile",
+    "pstats", "timeit", "trace", "traceback", "gc", "inspect", "site",
+    "sysconfig", "importlib", "keyword", "pkgutil", "modulefinder",
+    "runpy", "parser", "ast", "symtable", "token", "tokenize", "tabnanny",
+    "pyclbr", "py_compile", "compileall", "dis", "pickletools", "distutils",
+    "venv", "zipapp", "faulthandler", "tracemalloc", "warnings", "contextlib"
+})
+
+
+# Claude: this function gets the standard library module names, computed once and shared
+@functools.lru_cache(maxsize=1)
+def get_stdlib_modules() -> FrozenSet[str]:
     # Claude: use sys.stdlib_module_names for Python 3.10+
     if hasattr(sys, "stdlib_module_names"):
-        return set(sys.stdlib_module_names)
+        return frozenset(sys.stdlib_module_names)
     
     # Claude: fallback for older Python versions
     try:
         import isort
-        return set(isort.stdlibs.py3.stdlib)
+        return frozenset(isort.stdlibs.py3.stdlib)
     except ImportError:
-        # Claude: minimal fallback list of common stdlib modules
-        return {
-            "os", "sys", "json", "re", "datetime", "collections", "itertools",
-            "functools", "pathlib", "urllib", "http", "email", "xml", "html",
-            "csv", "sqlite3", "logging", "argparse", "subprocess", "threading",
-            "multiprocessing", "asyncio", "typing", "dataclasses", "enum",
-            "abc", "contextlib", "weakref", "copy", "pickle", "base64", "hashlib",
-            "hmac", "secrets", "uuid", "random", "math", "statistics", "decimal",
-            "fractions", "cmath", "time", "calendar", "zoneinfo", "locale",
-            "gettext", "io", "StringIO", "BytesIO", "tempfile", "glob", "fnmatch",
-            "linecache", "shutil", "stat", "filecmp", "tarfile", "zipfile",
-            "gzip", "bz2", "lzma", "configparser", "platform", "ctypes",
-            "struct", "codecs", "unicodedata", "stringprep", "readline",
-            "rlcompleter", "cmd", "shlex", "tkinter", "turtle", "pdb", "profile",
-            "pstats", "timeit", "trace", "traceback", "gc", "inspect", "site",
-            "sysconfig", "importlib", "keyword", "pkgutil", "modulefinder",
-            "runpy", "parser", "ast", "symtable", "token", "tokenize", "tabnanny",
-            "pyclbr", "py_compile", "compileall", "dis", "pickletools", "distutils",
-            "venv", "zipapp", "faulthandler", "tracemalloc", "warnings", "contextlib"
-        }
-
-
-# Claude: this function detects if an import is a local file or package
-def detect_local_import(import_name: str, file_path: Path) -> bool:
+        return _FALLBACK_STDLIB
+
+
+_STDLIB_MODULES = get_stdlib_modules()
+
+
+# Claude: this function resolves a directory once per run, files in the same directory share the result
+@functools.lru_cache(maxsize=None)
+def resolve_directory(directory: Path) -> Path:
+    try:
+        return directory.resolve()
+    except (OSError, RuntimeError):
+        return directory
+
+
+# Claude: this function lists a directory's .py module names and subdirectory names, scanned once per directory
+# Claude: DirEntry file types come from the directory listing itself, so no per-entry stat is needed
+@functools.lru_cache(maxsize=None)
+def list_local_modules(directory: str) -> tuple[FrozenSet[str], FrozenSet[str]]:
+    modules = set()
+    subdirectories = set()
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Claude: ignore symlinks that lead outside the directory to prevent path traversal
+                if entry.is_symlink() and not os.path.realpath(entry.path).startswith(directory + os.sep):
+                    continue
+                
+                if entry.name.endswith(".py") and entry.is_file():
+                    modules.add(entry.name[:-3])
+                elif entry.is_dir():
+                    subdirectories.add(entry.name)
+    except OSError:
+        pass
+    
+    return frozenset(modules), frozenset(subdirectories)
+
+
+# Claude: this function checks whether a directory is a package, only called for names that are imported
+@functools.lru_cache(maxsize=None)
+def is_package_directory(directory: str) -> bool:
+    return os.path.isfile(os.path.join(directory, "__init__.py"))
+
+
+# Claude: this function checks for a same directory .py file or package directory
+def is_local_module(name: str, directory: str) -> bool:
+    modules, subdirectories = list_local_modules(directory)
+    if name in modules:
+        return True
+    return name in subdirectories and is_package_directory(os.path.join(directory, name))
+
+
+# Claude: this function detects if an import is a local file or package within a resolved script directory
+def detect_local_import_in_directory(import_name: str, directory: Path) -> bool:
     # Claude: handle relative imports (starting with dots)
     if import_name.startswith("."):
         return True
     
-    # Claude: get the directory containing the current file
-    file_dir = file_path.parent
-    
-    # Claude: resolve the file directory to prevent path traversal
-    try:
-        resolved_file_dir = file_dir.resolve()
-    except (OSError, RuntimeError):
-        return False
-    
     # Claude: split import name for handling dotted imports
     import_parts = import_name.split(".")
     base_import = import_parts[0]
     
-    # Claude: check for same directory .py file
-    potential_py_file = resolved_file_dir / f"{base_import}.py"
-    if potential_py_file.exists() and potential_py_file.is_file():
-        # Claude: validate file is within expected boundaries
-        try:
-            resolved_potential = potential_py_file.resolve()
-            if str(resolved_potential).startswith(str(resolved_file_dir)):
-                return True
-        except (OSError, RuntimeError):
-            pass
-    
-    # Claude: check for package directory with __init__.py
-    potential_package_dir = resolved_file_dir / base_import
-    if potential_package_dir.exists() and potential_package_dir.is_dir():
-        init_file = potential_package_dir / "__init__.py"
-        if init_file.exists() and init_file.is_file():
-            # Claude: validate package is within expected boundaries
-            try:
-                resolved_package = potential_package_dir.resolve()
-                if str(resolved_package).startswith(str(resolved_file_dir)):
-                    return True
-            except (OSError, RuntimeError):
-                pass
-    
-    # Claude: check for subdirectory imports (e.g., utils.helper)
-    if len(import_parts) > 1:
-        # Claude: construct potential subdirectory path
-        subdir_path = resolved_file_dir
-        for part in import_parts[:-1]:
-            subdir_path = subdir_path / part
-        
-        # Claude: check for .py file in subdirectory
-        potential_subdir_file = subdir_path / f"{import_parts[-1]}.py"
-        if potential_subdir_file.exists() and potential_subdir_file.is_file():
-            try:
-                resolved_subdir = potential_subdir_file.resolve()
-                if str(resolved_subdir).startswith(str(resolved_file_dir)):
-                    return True
-            except (OSError, RuntimeError):
-                pass
+    if is_local_module(base_import, str(directory)):
+        return True
+    
+    # Claude: check for subdirectory imports (e.g., utils.helper), only when that directory exists
+    if len(import_parts) > 1 and base_import in list_local_modules(str(directory))[1]:
+        return is_local_module(import_parts[-1], str(directory.joinpath(*import_parts[:-1])))
     
     return False
 
@@ -207,103 +483,185 @@ def display_banner():
     print("└─ GitHub: https://github.com/nvthvniel/porter")
 
 
+# Claude: this function locates the uv executable once per run
+@functools.lru_cache(maxsize=1)
+def find_uv() -> Optional[str]:
+    # Claude: imported lazily to keep CLI startup fast, shutil pulls in the compression modules
+    import shutil
+    
+    return shutil.which("uv")
+
+
 # Claude: this function validates UV installation
 def validate_uv_installation() -> bool:
+    # Claude: a PATH lookup is enough to confirm uv exists, no need to spawn it
+    return find_uv() is not None
+
+
+# Claude: matches a PEP 723 inline metadata block, as in the PEP's reference implementation
+SCRIPT_METADATA_BLOCK = re.compile(r"(?m)^# /// (?P<type>[a-zA-Z0-9-]+)$\s(?P<content>(^#(| .*)$\s)+)^# ///$")
+
+# Claude: cache of existing script dependencies keyed by resolved path
+_EXISTING_DEPS_CACHE: Dict[Path, Set[str]] = {}
+
+
+# Claude: this function normalizes a package name so different spellings compare equal (PEP 503)
+def normalize_package_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+# Claude: this function reads the dependencies declared in a script's inline metadata block
+# Claude: returns None when the block exists but can't be parsed here
+def read_script_dependencies(file_path: Path) -> Optional[Set[str]]:
     try:
-        result = subprocess.run(
-            ["uv", "--version"],
-            capture_output=True,
-            text=True,
-            shell=False,  # Claude: prevent command injection
-            timeout=10
-        )
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
+        script = file_path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    
+    blocks = [match for match in SCRIPT_METADATA_BLOCK.finditer(script) if match.group("type") == "script"]
+    if not blocks:
+        # Claude: no metadata block means the script declares no dependencies yet
+        return set()
+    if len(blocks) > 1:
+        return None
+    
+    try:
+        import tomllib
+    except ImportError:
+        # Claude: Python < 3.11 has no TOML parser in the standard library
+        return None
+    
+    content = "".join(
+        line[2:] if line.startswith("# ") else line[1:]
+        for line in blocks[0].group("content").splitlines(keepends=True)
+    )
+    try:
+        metadata = tomllib.loads(content)
+    except tomllib.TOMLDecodeError:
+        return None
+    
+    dependencies = metadata.get("dependencies", [])
+    if not isinstance(dependencies, list):
+        return None
+    
+    # Claude: keep only the bare package name, dropping extras, version specifiers and markers
+    return {
+        normalize_package_name(re.split(r"[\s\[<>=!~;@(]", str(dependency).strip(), maxsplit=1)[0])
+        for dependency in dependencies
+    }
 
 
-# Claude: this function gets existing script dependencies
-def get_existing_dependencies(file_path: Path) -> Set[str]:
+# Claude: this function asks uv for a script's dependencies, returns None if uv couldn't be run
+def get_uv_tree_dependencies(file_path: Path) -> Optional[Set[str]]:
+    # Claude: imported lazily to keep CLI startup fast
+    import subprocess
+    
+    deps = set()
     try:
         result = subprocess.run(
-            ["uv", "tree", "--python-platform", str(file_path)],
-            capture_output=True,
+            [find_uv() or "uv", "tree", "--script", str(file_path), "--depth", "0"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,  # Claude: only the tree itself is parsed
             text=True,
-            shell=False,  # Claude: prevent command injection
+            close_fds=False,  # Claude: with an absolute executable this lets subprocess use posix_spawn
             timeout=30
         )
         # Claude: parse output to extract existing dependencies
         # This is a simplified approach - UV's tree output format may vary
         if result.returncode == 0:
             lines = result.stdout.strip().split("\n")
-            deps = set()
             for line in lines:
                 if line.strip() and not line.startswith(" "):
                     # Claude: extract package name from tree output
                     package = line.split()[0]
-                    deps.add(package)
-            return deps
+                    deps.add(normalize_package_name(package))
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
-    return set()
+        return None
+    
+    return deps
+
+
+# Claude: this function gets existing script dependencies, file_path must already be resolved
+def get_existing_dependencies(file_path: Path) -> Set[str]:
+    if file_path in _EXISTING_DEPS_CACHE:
+        return _EXISTING_DEPS_CACHE[file_path]
+    
+    # Claude: the inline metadata block is the source of truth, reading it avoids a uv subprocess
+    deps = read_script_dependencies(file_path)
+    if deps is None:
+        deps = get_uv_tree_dependencies(file_path)
+        if deps is None:
+            # Claude: don't cache transient failures
+            return set()
+    
+    _EXISTING_DEPS_CACHE[file_path] = deps
+    return deps
 
 
-# Claude: this function adds dependencies using UV
-def add_dependencies(file_path: Path, dependencies: Set[str], dry_run: bool = False, verbose: bool = False) -> bool:
+# Claude: this function adds dependencies using UV, file_path should already be resolved as validate_file_list does
+def add_dependencies(file_path: Path, dependencies: Set[str], dry_run: bool = False, verbose: bool = False, output: Optional[TextIO] = None) -> bool:
     if not dependencies:
         if verbose:
-            print("No dependencies to add")
+            print("No dependencies to add", file=output)
         return True
 
-    # Claude: validate file path to prevent path traversal
-    resolved_path = file_path.resolve()
-    if not resolved_path.is_file():
-        print(f"Error: {file_path} is not a valid file")
+    # Claude: a single stat rejects directories and missing paths from direct callers
+    if not os.path.isfile(file_path):
+        print(f"Error: {file_path} is not a valid file", file=output)
         return False
 
     # Claude: get existing dependencies to avoid duplicates
-    existing_deps = get_existing_dependencies(resolved_path)
-    new_deps = dependencies - existing_deps
+    existing_deps = get_existing_dependencies(file_path)
+    new_deps = [dep for dep in sorted(dependencies) if normalize_package_name(dep) not in existing_deps]
 
     if not new_deps:
         if verbose:
-            print("All dependencies already exist")
+            print("All dependencies already exist", file=output)
         return True
 
     if dry_run:
-        print(f"DRY RUN: Would execute: uv add --script {resolved_path} {' '.join(sorted(new_deps))}")
+        print(f"DRY RUN: Would execute: uv add --script {file_path} {' '.join(new_deps)}", file=output)
         return True
 
+    # Claude: imported lazily to keep CLI startup fast
+    import subprocess
+    
     try:
         # Claude: batch all dependencies in a single command for efficiency
-        cmd = ["uv", "add", "--script", str(resolved_path)] + sorted(new_deps)
+        cmd = [find_uv() or "uv", "add", "--script", str(file_path)] + new_deps
         result = subprocess.run(
             cmd,
-            capture_output=True,
+            stdout=subprocess.DEVNULL,  # Claude: only stderr is reported, on failure
+            stderr=subprocess.PIPE,
             text=True,
-            shell=False,  # Claude: prevent command injection
+            close_fds=False,  # Claude: with an absolute executable this lets subprocess use posix_spawn
             timeout=120
         )
 
         if result.returncode == 0:
+            # Claude: keep the cached view of the script in sync with what was just added
+            _EXISTING_DEPS_CACHE[file_path] = existing_deps | {normalize_package_name(dep) for dep in new_deps}
+            # Claude: the script's imports are unchanged, so keep its cache entry valid for the next run
+            refresh_cached_imports(str(file_path))
+            
             if verbose:
 
-                for dep in sorted(new_deps):
-                    print(f" | {dep}")
+                for dep in new_deps:
+                    print(f" | {dep}", file=output)
 
             return True
         else:
-            print(f"Error adding dependencies: {result.stderr}")
-            print("Suggestion: Check if the dependencies exist or if there are network issues")
+            print(f"Error adding dependencies: {result.stderr}", file=output)
+            print("Suggestion: Check if the dependencies exist or if there are network issues", file=output)
             return False
 
     except subprocess.TimeoutExpired:
-        print("Timeout while adding dependencies (exceeded 2 minutes)")
-        print("Suggestion: Check network connectivity or try with fewer dependencies")
+        print("Timeout while adding dependencies (exceeded 2 minutes)", file=output)
+        print("Suggestion: Check network connectivity or try with fewer dependencies", file=output)
         return False
     except Exception as e:
-        print(f"Unexpected error: {e}")
-        print("Suggestion: Please check the file permissions and UV installation")
+        print(f"Unexpected error: {e}", file=output)
+        print("Suggestion: Please check the file permissions and UV installation", file=output)
         return False
 
 
@@ -311,6 +669,17 @@ def add_dependencies(file_path: Path, dependencies: Set[str], dry_run: bool = Fa
 
 
 
+# Claude: this class holds the outcome for a single file, slotted to keep large batches compact
+class FileResult:
+    __slots__ = ("path", "dependencies", "success", "error")
+    
+    def __init__(self, path: str, dependencies: FrozenSet[str], success: bool, error: Optional[str]):
+        self.path = path
+        self.dependencies = dependencies
+        self.success = success
+        self.error = error
+
+
 # Claude: this class tracks processing results and errors
 class ProcessingResult:
     def __init__(self):
@@ -318,10 +687,10 @@ class ProcessingResult:
         self.successful_files = 0
         self.failed_files = 0
         self.total_dependencies = 0
-        self.file_results: Dict[str, Dict] = {}
+        self.file_results: List[FileResult] = []
         self.errors: List[str] = []
         self.local_import_warnings: Dict[str, Set[str]] = {}
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
     
     def add_file_result(self, file_path: Path, dependencies: Set[str], success: bool, local_imports: Set[str] = set(), error: Optional[str] = None):
         self.processed_files += 1
@@ -337,28 +706,26 @@ class ProcessingResult:
         if local_imports:
             self.local_import_warnings[str(file_path)] = local_imports
         
-        self.file_results[str(file_path)] = {
-            "dependencies": dependencies,
-            "success": success,
-            "error": error
-        }
+        self.file_results.append(FileResult(str(file_path), frozenset(dependencies), success, error))
     
     def get_summary(self) -> str:
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = time.perf_counter() - self.start_time
         
-        summary = f"\n[+] Processing Summary:\n"
-        summary += f" | Files processed: {self.processed_files}\n"
-        summary += f" | Successful: {self.successful_files}\n"
-        summary += f" | Failed: {self.failed_files}\n"
-        summary += f" | Total dependencies added: {self.total_dependencies}\n"
-        summary += f" | Time taken: {elapsed_time:.2f} seconds\n"
+        # Claude: collect lines and join once, the error list can be long in batch runs
+        parts: List[str] = [
+            "\n[+] Processing Summary:\n",
+            f" | Files processed: {self.processed_files}\n",
+            f" | Successful: {self.successful_files}\n",
+            f" | Failed: {self.failed_files}\n",
+            f" | Total dependencies added: {self.total_dependencies}\n",
+            f" | Time taken: {elapsed_time:.2f} seconds\n",
+        ]
         
         if self.errors:
-            summary += f"\n[!] Errors encountered:\n"
-            for error in self.errors:
-                summary += f" | {error}\n"
+            parts.append("\n[!] Errors encountered:\n")
+            parts.extend(f" | {error}\n" for error in self.errors)
         
-        return summary
+        return "".join(parts)
     
     def print_local_import_warnings(self):
         # Claude: display local import warnings in grouped format after processing
@@ -369,22 +736,33 @@ class ProcessingResult:
                     print(f" | {file_path}/{local_import}")
 
 
-# Claude: this function processes a single file and returns results
-def process_single_file(file_path: Path, dry_run: bool = False, verbose: bool = False) -> tuple[Set[str], Set[str], bool, Optional[str]]:
+# Claude: this function extracts dependencies from a single file without modifying it
+# Claude: messages are collected and returned rather than printed, so a worker thread's output isn't interleaved
+def extract_file_dependencies(file_path: Path, file_stat: Optional[os.stat_result] = None) -> tuple[tuple[Set[str], Set[str], Optional[str]], str]:
+    output = io.StringIO()
+    try:
+        external_dependencies, local_imports = extract_dependencies(file_path, file_stat, output)
+        return (external_dependencies, local_imports, None), output.getvalue()
+    except Exception as e:
+        return (set(), set(), str(e)), output.getvalue()
+
+
+# Claude: this function applies the result of extract_file_dependencies to a single file, returning its messages too
+def apply_file_dependencies(file_path: Path, extraction: tuple[Set[str], Set[str], Optional[str]], dry_run: bool = False, verbose: bool = False) -> tuple[bool, Optional[str], str]:
+    external_dependencies, _, error = extraction
+    if error is not None:
+        return False, error, ""
+    
+    output = io.StringIO()
     try:
-        # Claude: extract dependencies and local imports
-        external_dependencies, local_imports = extract_dependencies(file_path)
-        
         # Claude: add only external dependencies
-        success = add_dependencies(file_path, external_dependencies, dry_run, verbose)
-        
-        return external_dependencies, local_imports, success, None
+        return add_dependencies(file_path, external_dependencies, dry_run, verbose, output), None, output.getvalue()
     except Exception as e:
-        return set(), set(), False, str(e)
+        return False, str(e), output.getvalue()
 
 
-# Claude: this function validates and processes multiple files
-def validate_file_list(file_paths: List[str], verbose: bool = False) -> List[Path]:
+# Claude: this function validates multiple files, returning each resolved path with its stat result
+def validate_file_list(file_paths: List[str], verbose: bool = False) -> List[tuple[Path, os.stat_result]]:
     validated_files = []
     seen_paths = set()
     
@@ -405,13 +783,15 @@ def validate_file_list(file_paths: List[str], verbose: bool = False) -> List[Pat
             continue
         seen_paths.add(str(resolved_path))
         
-        # Claude: validate file exists
-        if not resolved_path.exists():
+        # Claude: validate file exists, a single stat serves both checks below
+        try:
+            file_stat = resolved_path.stat()
+        except OSError:
             print(f"Error: File does not exist: {file_path}")
             continue
         
         # Claude: validate it's a file
-        if not resolved_path.is_file():
+        if not stat.S_ISREG(file_stat.st_mode):
             print(f"Error: Path is not a file: {file_path}")
             continue
         
@@ -420,7 +800,7 @@ def validate_file_list(file_paths: List[str], verbose: bool = False) -> List[Pat
             print(f"Error: File is not a Python file: {file_path}")
             continue
         
-        validated_files.append(resolved_path)
+        validated_files.append((resolved_path, file_stat))
     
     return validated_files
 
@@ -440,17 +820,52 @@ def process_multiple_files(file_paths: List[str], dry_run: bool = False, verbose
     if verbose:
         print(f"\n[+] Processing {len(valid_files)} Python files")
     
-    # Claude: process files sequentially with progress tracking
-    for i, file_path in enumerate(valid_files, 1):
-        if verbose:
-            print(f"\n[+] {i}/{len(valid_files)}: {file_path}")
+    # Claude: imported lazily to keep CLI startup fast
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    
+    # Claude: extraction is pure Python and cheap, the uv add subprocesses release the GIL
+    max_workers = min(len(valid_files), os.cpu_count() or 1)
+    # Claude: uv add is subprocess-bound, so oversubscribe the CPU count like ThreadPoolExecutor's default
+    apply_workers = min(len(valid_files), 32, (os.cpu_count() or 1) * 4)
+    extract_executor = ThreadPoolExecutor(max_workers=max_workers)
+    apply_executor = ThreadPoolExecutor(max_workers=apply_workers)
+    extraction_futures = {}
+    futures = {}
+    try:
+        for file_path, file_stat in valid_files:
+            extraction_futures[extract_executor.submit(extract_file_dependencies, file_path, file_stat)] = file_path
         
-        dependencies, local_imports, success, error = process_single_file(file_path, dry_run, verbose)
-        result.add_file_result(file_path, dependencies, success, local_imports, error)
+        # Claude: hand each file to the uv add pool as soon as its extraction finishes
+        for extraction_future in as_completed(extraction_futures):
+            file_path = extraction_futures[extraction_future]
+            extraction, extract_output = extraction_future.result()
+            future = apply_executor.submit(apply_file_dependencies, file_path, extraction, dry_run, verbose)
+            futures[future] = (file_path, extraction, extract_output)
         
-        # Claude: provide immediate feedback for failures
-        if not success and error:
-            print(f"Error processing {file_path}: {error}")
+        # Claude: report progress in completion order, printing each file's output together from this thread
+        for i, future in enumerate(as_completed(futures), 1):
+            file_path, (dependencies, local_imports, _), extract_output = futures[future]
+            success, error, apply_output = future.result()
+            
+            if verbose:
+                print(f"\n[+] {i}/{len(valid_files)}: {file_path}")
+            print(extract_output + apply_output, end="")
+            
+            result.add_file_result(file_path, dependencies, success, local_imports, error)
+            
+            # Claude: provide immediate feedback for failures
+            if not success and error:
+                print(f"Error processing {file_path}: {error}")
+    except BaseException:
+        # Claude: on Ctrl-C or any error drop every queued file so no further uv add is started
+        for future in list(extraction_futures) + list(futures):
+            future.cancel()
+        extract_executor.shutdown(wait=False)
+        apply_executor.shutdown(wait=False)
+        raise
+    
+    extract_executor.shutdown()
+    apply_executor.shutdown()
     
     # Claude: display all local import warnings after processing
     result.print_local_import_warnings()
@@ -471,6 +886,7 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Show what would be done without making changes")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
     parser.add_argument("--no-banner", action="store_true", help="Disable ASCII art banner display")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the on-disk import cache")
 
     args = parser.parse_args()
     
@@ -484,9 +900,16 @@ def main():
     if not args.no_banner:
         display_banner()
     
+    # Claude: load imports found on previous runs so unchanged files aren't parsed again
+    if not args.no_cache:
+        load_deps_cache()
+    
     # Claude: process multiple files
     result = process_multiple_files(args.files, args.dry_run, args.verbose)
     
+    if not args.no_cache:
+        save_deps_cache()
+    
     # Claude: display summary if verbose or if there were any issues
     if args.verbose or result.failed_files > 0:
         print(result.get_summary())